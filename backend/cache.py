@@ -0,0 +1,34 @@
+import asyncio
+import logging
+import orjson
+import redis.asyncio as redis
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Shared Redis connection for sessions and cached Crucible lookups
+redis_client = redis.Redis.from_url(settings().redis_url, decode_responses=True)
+
+
+async def cached(key, ttl, loader, *args, **kwargs):
+    """
+    Return the value cached under key, calling loader(*args, **kwargs) on a miss.
+
+    Args:
+        key: Redis key to read/write
+        ttl: Expiry in seconds for a freshly loaded value
+        loader: Blocking function producing a JSON-serializable value; run in a
+            worker thread so it does not stall the event loop
+
+    Returns:
+        The cached or freshly loaded value. None results are not cached.
+    """
+    value = await redis_client.get(key)
+    if value is not None:
+        logger.debug("Cache hit: %s", key)
+        return orjson.loads(value)
+
+    value = await asyncio.to_thread(loader, *args, **kwargs)
+    if value is not None:
+        await redis_client.set(key, orjson.dumps(value), ex=ttl)
+    return value
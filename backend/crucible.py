@@ -0,0 +1,21 @@
+import logging
+
+from pycrucible import CrucibleClient
+from retrying import with_backoff
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# For now we use admin client, but future have ORCID login and set up client that way
+# Single client shared by all route modules so they share one connection pool
+crucible_url = settings().crucible_url
+client = CrucibleClient(crucible_url, settings().admin_apikey)
+logger.info("Crucible client initialized with URL: %s", crucible_url)
+
+
+@with_backoff()
+def crucible_call(func, *args, **kwargs):
+    """
+    Call a mutating Crucible client method, retrying rate-limit errors.
+    """
+    return func(*args, **kwargs)
@@ -1,8 +1,11 @@
 from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+from middleware import FastCORS, RequestTimingMiddleware
+from static_files import CachedStaticFiles
 from routes import auth, synthesis, batch
 import logging
+import os
 
 # Configure logging
 logging.basicConfig(
@@ -11,31 +14,47 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Synthesis Data API")
-app.mount("/", StaticFiles(directory="static", html=True), name="static")
+# API sub-app: routers plus the middleware that only API traffic needs
+api_app = FastAPI(title="Synthesis Data API", default_response_class=ORJSONResponse)
+
+api_app.add_middleware(RequestTimingMiddleware)
+
+# Compress JSON responses; added before CORS so it sits inside the CORS layer
+api_app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
 
 # CORS middleware for React frontend
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173", "http://localhost:3000"],  # Vite default port
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+api_app.add_middleware(
+    FastCORS,
+    allowed_origins=frozenset({"http://localhost:5173", "http://localhost:3000"}),  # Vite default port
 )
 
 # Include routers
-app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
-app.include_router(synthesis.router, prefix="/api/synthesis", tags=["synthesis"])
-app.include_router(batch.router, prefix="/api/batch", tags=["batch"])
-
-@app.get("/")
-async def root():
-    return {"message": "Synthesis Data API", "status": "running"}
+api_app.include_router(auth.router, prefix="/auth", tags=["auth"])
+api_app.include_router(synthesis.router, prefix="/synthesis", tags=["synthesis"])
+api_app.include_router(batch.router, prefix="/batch", tags=["batch"])
 
-@app.get("/health")
+@api_app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+# Root app: no middleware of its own, so static files skip the API stack entirely
+app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+app.mount("/api", api_app, name="api")
+
+# Mounted last as a catch-all so /api takes precedence.
+# The built React app only exists in the container image; in dev Vite serves the frontend
+if os.path.isdir("static"):
+    app.mount("/", CachedStaticFiles(directory="static", html=True), name="static")
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+        # 2n+1 workers for I/O-bound handlers; ignored by uvicorn when reload is on
+        workers=int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1)),
+        reload=os.getenv('RUN_ENV') != 'cloud',
+    )
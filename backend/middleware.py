@@ -0,0 +1,120 @@
+import time
+
+
+class FastCORS:
+    """
+    Minimal pure-ASGI CORS middleware.
+
+    All response headers are encoded once in __init__ so the per-request work
+    is a single scan of the request headers for the Origin.
+
+    Args:
+        app: Downstream ASGI application
+        allowed_origins: Origins allowed to make cross-origin requests
+        allow_methods: Methods advertised in preflight responses
+        max_age: Seconds browsers may cache a preflight response
+    """
+
+    def __init__(self, app, allowed_origins=frozenset(),
+                 allow_methods=("GET", "POST", "PUT", "DELETE", "OPTIONS"), max_age=600):
+        self.app = app
+        self.allowed_origins = frozenset(o.encode("latin-1") for o in allowed_origins)
+        self._simple_headers = [
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+        self._preflight_headers = [
+            (b"access-control-allow-methods", ", ".join(allow_methods).encode("latin-1")),
+            (b"access-control-allow-headers", b"*"),
+            (b"access-control-max-age", str(max_age).encode("latin-1")),
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        request_method = None
+        request_headers = None
+        for key, value in scope["headers"]:
+            if key == b"origin":
+                origin = value
+            elif key == b"access-control-request-method":
+                request_method = value
+            elif key == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self._preflight(origin, request_headers, send)
+            return
+
+        if origin not in self.allowed_origins:
+            await self.app(scope, receive, send)
+            return
+
+        cors_headers = [(b"access-control-allow-origin", origin)] + self._simple_headers
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + cors_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    async def _preflight(self, origin, request_headers, send):
+        if origin not in self.allowed_origins:
+            body = b"Disallowed CORS origin"
+            await send({
+                "type": "http.response.start",
+                "status": 400,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        headers = [(b"access-control-allow-origin", origin)] + self._preflight_headers
+        if request_headers is not None:
+            # Echo the requested headers: browsers ignore the "*" wildcard on
+            # credentialed requests
+            headers[2] = (b"access-control-allow-headers", request_headers)
+        headers.append((b"content-length", b"0"))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+
+class RequestTimingMiddleware:
+    """
+    Pure-ASGI middleware that adds an x-response-time header (milliseconds).
+
+    Works on the raw ASGI messages, so no Request/Response objects are built.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-response-time", f"{elapsed_ms:.2f}ms".encode("latin-1"))
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
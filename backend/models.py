@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, field_validator
 from typing import List, Optional, Dict, Any
 
 # ============================================================================
@@ -6,6 +6,9 @@ from typing import List, Optional, Dict, Any
 # ============================================================================
 
 class LoginRequest(BaseModel):
+    # Normalize during validation so handlers receive a canonical email
+    model_config = ConfigDict(str_strip_whitespace=True, str_to_lower=True)
+
     email: EmailStr
 
 class UserInfo(BaseModel):
@@ -47,10 +50,18 @@ class SynthesisUploadResponse(BaseModel):
 # ============================================================================
 
 class BatchResolveRequest(BaseModel):
-    batch_id: str
+    batch_id: Optional[str] = None
     orcid: str
     project: str
 
+    @field_validator("batch_id")
+    @classmethod
+    def strip_batch_id(cls, value):
+        # Blank input means "no batch"
+        if value is None:
+            return None
+        return value.strip() or None
+
 class BatchMatch(BaseModel):
     unique_id: str
     sample_name: str
@@ -0,0 +1,108 @@
+import functools
+import logging
+import threading
+import time
+
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+from tenacity.wait import wait_base
+
+logger = logging.getLogger(__name__)
+
+# Only statuses where the request was not applied are retried: the wrapped
+# calls create records, so retrying after a generic 5xx could duplicate them
+RETRY_STATUS_CODES = frozenset({429, 503})
+RETRY_ATTEMPTS = 6
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: at most `rate` calls per `period` seconds.
+
+    acquire() blocks the calling thread until a token is available, so
+    concurrent upload workers share one quota.
+
+    Args:
+        rate: Calls allowed per period (also the burst size)
+        period: Length of the period in seconds
+    """
+
+    def __init__(self, rate, period):
+        self.capacity = rate
+        self.fill_rate = rate / period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.fill_rate)
+            self._updated = now
+            self._tokens -= 1
+            # A negative balance is the time this caller owes before its token exists
+            delay = -self._tokens / self.fill_rate if self._tokens < 0 else 0
+        if delay:
+            logger.debug("Rate limited, waiting %.2fs", delay)
+            time.sleep(delay)
+
+
+def _response(exc):
+    # gspread.exceptions.APIError and requests.HTTPError both carry the response
+    return getattr(exc, 'response', None)
+
+
+def is_retryable(exc):
+    return getattr(_response(exc), 'status_code', None) in RETRY_STATUS_CODES
+
+
+class wait_retry_after(wait_base):
+    """
+    Wait for the server's Retry-After (in seconds) when given, else fall back.
+    """
+
+    def __init__(self, fallback, max_wait=60):
+        self.fallback = fallback
+        self.max_wait = max_wait
+
+    def __call__(self, retry_state):
+        response = _response(retry_state.outcome.exception())
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        try:
+            return min(float(retry_after), self.max_wait)
+        except (TypeError, ValueError):
+            return self.fallback(retry_state)
+
+
+def _log_retry(retry_state):
+    logger.warning("%s failed (attempt %s/%s): %s; retrying",
+                   getattr(retry_state.fn, '__qualname__', retry_state.fn),
+                   retry_state.attempt_number, RETRY_ATTEMPTS,
+                   retry_state.outcome.exception())
+
+
+def with_backoff(limiter=None):
+    """
+    Decorate a function to retry rate-limit/unavailable errors with exponential
+    backoff and jitter, honoring Retry-After. If a RateLimiter is given, every
+    attempt takes a token from it first.
+    """
+    def decorate(func):
+        @retry(
+            wait=wait_retry_after(wait_exponential_jitter(initial=0.5, max=30)),
+            stop=stop_after_attempt(RETRY_ATTEMPTS),
+            retry=retry_if_exception(is_retryable),
+            before_sleep=_log_retry,
+            reraise=True,
+        )
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if limiter is not None:
+                limiter.acquire()
+            return func(*args, **kwargs)
+        return wrapper
+    return decorate
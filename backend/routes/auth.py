@@ -1,11 +1,11 @@
 from fastapi import APIRouter, HTTPException
 from models import LoginRequest, LoginResponse, UserInfo
+import asyncio
 import logging
 import secrets
-import os
-from dotenv import load_dotenv
+from cache import redis_client, cached
 
-from pycrucible import CrucibleClient
+from crucible import client
 from pycrucible.models import BaseDataset
 from pycrucible.utils import get_tz_isoformat
 
@@ -13,16 +13,57 @@ from pycrucible.utils import get_tz_isoformat
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Simple in-memory session store (replace with Redis/DB for production)
-sessions = {}
+# Sessions live in Redis so they are shared by every worker/replica
+SESSION_TTL = 24 * 60 * 60  # seconds
+# An existing session is only handed out again if it has at least this long left
+SESSION_REUSE_MIN_TTL = 5 * 60
 
-load_dotenv()
-crucible_url = "https://crucible.lbl.gov/testapi"
-admin_apikey = os.environ.get('ADMIN_APIKEY')
-client = CrucibleClient(crucible_url, admin_apikey)
-logger.info(f"Crucible client initialized with URL: {crucible_url}")
+# User identity rarely changes; project membership a little more often
+USER_CACHE_TTL = 10 * 60
+PROJECTS_CACHE_TTL = 5 * 60
+# email -> ORCID is effectively permanent; it lets us fetch projects alongside the user
+ORCID_CACHE_TTL = 7 * 24 * 60 * 60
 
-def lookup_user_by_email(email):
+def session_key(session_token):
+    return f"sess:{session_token}"
+
+def user_session_key(email):
+    return f"user_sess:{email}"
+
+async def get_or_create_session(email, orcid, name):
+    """
+    Return the user's live session token, or mint and store a new one.
+
+    Args:
+        email: Normalized user email (keys the reverse index)
+        orcid: User's ORCID identifier
+        name: User's full name
+
+    Returns:
+        str: Session token
+    """
+    existing = await redis_client.get(user_session_key(email))
+    if existing and await redis_client.ttl(session_key(existing)) > SESSION_REUSE_MIN_TTL:
+        logger.debug("Reusing existing session for %s", email)
+        return existing
+
+    # 18 random bytes -> 24 URL-safe characters (144 bits)
+    session_token = secrets.token_urlsafe(18)
+
+    # Store session with an expiry so abandoned sessions clean themselves up
+    key = session_key(session_token)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        await (pipe.hset(key, mapping={
+                    "email": email,
+                    "orcid": orcid,
+                    "name": name
+                })
+                .expire(key, SESSION_TTL)
+                .set(user_session_key(email), session_token, ex=SESSION_TTL)
+                .execute())
+    return session_token
+
+async def lookup_user_by_email(email):
     """
     Lookup user information by email.
 
@@ -35,20 +76,32 @@ def lookup_user_by_email(email):
         - name: str, user's full name
         - projects_list: list of str, available projects
     """
-    logger.debug(f"Looking up user by email: {email}")
-    user = client.get_user(email = email)
+    logger.debug("Looking up user by email: %s", email)
+    known_orcid = await redis_client.get(f"orcid:{email}")
+    if known_orcid:
+        # We already know the ORCID, so list_projects doesn't have to wait on get_user
+        user, projects = await asyncio.gather(
+            cached(f"user:{email}", USER_CACHE_TTL, client.get_user, email = email),
+            cached(f"projects:{known_orcid}", PROJECTS_CACHE_TTL, client.list_projects, orcid = known_orcid)
+        )
+    else:
+        user = await cached(f"user:{email}", USER_CACHE_TTL, client.get_user, email = email)
+        projects = None
+
     if user:
-        logger.debug(f"User found: {user}")
+        logger.debug("User found: %s", user)
         orcid = user['orcid']
         full_name = f"{user['first_name']} {user['last_name']}"
         # TODO: this is actually wrong - should return projects based on ACL not ownership
-        projects = client.list_projects(orcid = user['orcid'])
-        logger.debug(f"Found {len(projects)} projects for user {orcid}")
+        if projects is None or orcid != known_orcid:
+            projects = await cached(f"projects:{orcid}", PROJECTS_CACHE_TTL, client.list_projects, orcid = orcid)
+            await redis_client.set(f"orcid:{email}", orcid, ex=ORCID_CACHE_TTL)
+        logger.debug("Found %s projects for user %s", len(projects), orcid)
         project_ids = [p['project_id'] for p in projects]
         project_ids.sort()
         return orcid, full_name, project_ids
     else:
-        logger.warning(f"No user found for email: {email}")
+        logger.warning("No user found for email: %s", email)
         return None, None, []
 
 
@@ -60,32 +113,24 @@ async def login(request: LoginRequest):
     Flow:
     1. Receive email from frontend
     2. Call lookup_user_by_email()
-    3. Generate session token
+    3. Reuse the user's live session token or generate a new one
     4. Return user info + token
     """
     try:
-        email = request.email.lower().strip()
-        logger.info(f"Login attempt for email: {email}")
+        email = request.email
+        logger.info("Login attempt for email: %s", email)
 
         # TODO: Call your actual function here
-        orcid, name, projects = lookup_user_by_email(email)
+        orcid, name, projects = await lookup_user_by_email(email)
 
         if not orcid or not name:
-            logger.warning(f"No user found for email: {email}")
+            logger.warning("No user found for email: %s", email)
             return LoginResponse(
                 success=False,
                 message=f"No user found with email: {email}"
             )
 
-        # Generate simple session token
-        session_token = secrets.token_urlsafe(32)
-
-        # Store session (in production, use Redis or database)
-        sessions[session_token] = {
-            "email": email,
-            "orcid": orcid,
-            "name": name
-        }
+        session_token = await get_or_create_session(email, orcid, name)
 
         user_info = UserInfo(
             email=email,
@@ -94,7 +139,7 @@ async def login(request: LoginRequest):
             projects=projects
         )
 
-        logger.info(f"Login successful for {name} ({email})")
+        logger.info("Login successful for %s (%s)", name, email)
 
         return LoginResponse(
             success=True,
@@ -104,7 +149,7 @@ async def login(request: LoginRequest):
         )
 
     except Exception as e:
-        logger.error(f"Login error: {str(e)}")
+        logger.error("Login error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/logout")
@@ -112,8 +157,7 @@ async def logout(session_token: str):
     """
     Logout user and invalidate session token.
     """
-    if session_token in sessions:
-        del sessions[session_token]
+    if await redis_client.delete(session_key(session_token)):
         return {"success": True, "message": "Logged out successfully"}
     return {"success": False, "message": "Invalid session"}
 
@@ -122,6 +166,7 @@ async def verify_session(session_token: str):
     """
     Verify if a session token is valid.
     """
-    if session_token in sessions:
-        return {"valid": True, "user": sessions[session_token]}
+    session = await redis_client.hgetall(session_key(session_token))
+    if session:
+        return {"valid": True, "user": session}
     return {"valid": False}
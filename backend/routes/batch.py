@@ -6,11 +6,12 @@ from models import (
     BatchCreateResponse,
     BatchMatch
 )
+import asyncio
 import logging
-import os
-from dotenv import load_dotenv
+import requests
+from cache import redis_client
 
-from pycrucible import CrucibleClient
+from crucible import client, crucible_call
 from pycrucible.models import BaseDataset
 from pycrucible.utils import get_tz_isoformat
 
@@ -18,41 +19,51 @@ from pycrucible.utils import get_tz_isoformat
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-load_dotenv()
-crucible_url = "https://crucible.lbl.gov/testapi"
-admin_apikey = os.environ.get('ADMIN_APIKEY')
-client = CrucibleClient(crucible_url, admin_apikey)
-logger.info(f"Crucible client initialized with URL: {crucible_url}")
+# Most inputs are sample names rather than unique_ids, so remember failed
+# unique_id lookups briefly instead of asking Crucible again
+NOT_A_SAMPLE_ID_TTL = 60
 
 
-def resolve_batch_id(batch_id_input, orcid, project):
-    if not batch_id_input or not batch_id_input.strip():
+async def resolve_batch_id(batch_id_input, orcid, project):
+    # batch_id_input arrives stripped (None if blank) from BatchResolveRequest
+    if batch_id_input is None:
         return {'status': 'resolved', 'batch_id': None}
 
-    batch_id_input = batch_id_input.strip()
-    logger.debug(f"Resolving batch ID: {batch_id_input}")
+    logger.debug("Resolving batch ID: %s", batch_id_input)
 
     # First try to get by unique_id
-    try:
-        batch = client.get_sample(batch_id_input)
+    negative_key = f"nosample:{batch_id_input}"
+    if not await redis_client.exists(negative_key):
+        try:
+            batch = await asyncio.to_thread(client.get_sample, batch_id_input)
+        except (KeyError, ValueError):
+            # Expected when the input is a name, not an id: no traceback logging.
+            # Listed first: requests' JSONDecodeError is also a RequestException.
+            batch = None
+        except requests.RequestException as err:
+            # A 4xx means "not a unique_id"; timeouts, connection errors and
+            # 5xx must not be remembered as a miss
+            status_code = getattr(err.response, 'status_code', None)
+            if status_code is None or status_code >= 500:
+                raise
+            batch = None
         if batch:
-            logger.debug(f"Batch found by unique_id: {batch}")
+            logger.debug("Batch found by unique_id: %s", batch)
             return {'status': 'resolved', 'batch_id': batch_id_input}
-    except:
-        pass
+        await redis_client.set(negative_key, "1", ex=NOT_A_SAMPLE_ID_TTL)
 
     # If not found by unique_id, try by sample name
-    batches_by_name = client.list_samples(sample_name=batch_id_input)
+    batches_by_name = await asyncio.to_thread(client.list_samples, sample_name=batch_id_input)
 
     if len(batches_by_name) == 0:
-        logger.debug(f"No batch found with name: {batch_id_input}")
+        logger.debug("No batch found with name: %s", batch_id_input)
         return {'status': 'not_found', 'input': batch_id_input}
     elif len(batches_by_name) == 1:
         resolved_id = batches_by_name[0]['unique_id']
-        logger.debug(f"Batch resolved to unique_id: {resolved_id}")
+        logger.debug("Batch resolved to unique_id: %s", resolved_id)
         return {'status': 'resolved', 'batch_id': resolved_id}
     else:
-        logger.debug(f"Multiple batches found with name: {batch_id_input}")
+        logger.debug("Multiple batches found with name: %s", batch_id_input)
         return {'status': 'multiple_matches', 'matches': batches_by_name, 'input': batch_id_input}
 
 
@@ -66,7 +77,8 @@ def create_batch_sample(batch_id, batch_name, description, orcid, project):
     3. Return the created batch object with unique_id
     """
     today_date = get_tz_isoformat()
-    new_batch = client.add_sample(
+    new_batch = crucible_call(
+        client.add_sample,
         sample_name=batch_id,
         description=description,
         creation_date=today_date,
@@ -91,10 +103,10 @@ async def resolve_batch(request: BatchResolveRequest):
        - 'not_found': Batch doesn't exist, offer to create
     """
     try:
-        logger.info(f"Resolving batch ID: {request.batch_id}")
+        logger.info("Resolving batch ID: %s", request.batch_id)
 
         # TODO: Call your actual function here
-        result = resolve_batch_id(request.batch_id, request.orcid, request.project)
+        result = await resolve_batch_id(request.batch_id, request.orcid, request.project)
 
         if result['status'] == 'resolved':
             return BatchResolveResponse(
@@ -104,8 +116,9 @@ async def resolve_batch(request: BatchResolveRequest):
             )
 
         elif result['status'] == 'multiple_matches':
+            # Crucible records are already well-formed; skip re-validation
             matches = [
-                BatchMatch(
+                BatchMatch.model_construct(
                     unique_id=match['unique_id'],
                     sample_name=match.get('sample_name', ''),
                     description=match.get('description'),
@@ -131,7 +144,7 @@ async def resolve_batch(request: BatchResolveRequest):
             raise ValueError(f"Unknown resolution status: {result['status']}")
 
     except Exception as e:
-        logger.error(f"Batch resolution error: {str(e)}")
+        logger.error("Batch resolution error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/create", response_model=BatchCreateResponse)
@@ -145,7 +158,7 @@ async def create_batch(request: BatchCreateRequest):
     3. Return created batch unique_id
     """
     try:
-        logger.info(f"Creating new batch: {request.batch_name} (ID: {request.batch_id})")
+        logger.info("Creating new batch: %s (ID: %s)", request.batch_name, request.batch_id)
 
         if not request.batch_name or not request.batch_id:
             raise ValueError("Batch name and ID are required")
@@ -153,7 +166,8 @@ async def create_batch(request: BatchCreateRequest):
         description = request.batch_description or f"Batch {request.batch_name}"
 
         # TODO: Call your actual function here
-        new_batch = create_batch_sample(
+        new_batch = await asyncio.to_thread(
+            create_batch_sample,
             batch_id=request.batch_id,
             batch_name=request.batch_name,
             description=description,
@@ -161,7 +175,7 @@ async def create_batch(request: BatchCreateRequest):
             project=request.project
         )
 
-        logger.info(f"Batch created with unique_id: {new_batch['unique_id']}")
+        logger.info("Batch created with unique_id: %s", new_batch['unique_id'])
 
         return BatchCreateResponse(
             success=True,
@@ -170,5 +184,5 @@ async def create_batch(request: BatchCreateRequest):
         )
 
     except Exception as e:
-        logger.error(f"Batch creation error: {str(e)}")
+        logger.error("Batch creation error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,15 +1,25 @@
-import os
-from dotenv import load_dotenv
+import asyncio
+import functools
+import hashlib
+import orjson
 import logging
-import pandas as pd
-import numpy as np
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 import gspread
 from google.auth import default
+from google.auth.transport.requests import AuthorizedSession
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from google.oauth2.service_account import Credentials
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Response
+from typing import Optional
 from models import SynthesisFieldsResponse, SynthesisUploadRequest, SynthesisUploadResponse
 
-from pycrucible import CrucibleClient
+from crucible import client, crucible_call
+from retrying import RateLimiter, with_backoff
+from settings import settings
 from pycrucible.models import BaseDataset
 from pycrucible.utils import get_tz_isoformat
 
@@ -17,19 +27,12 @@ from pycrucible.utils import get_tz_isoformat
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# For now we use admin client, but future have ORCID login and set up client that way
-RUN_ENV = os.getenv('RUN_ENV')
-if RUN_ENV != 'cloud':
-    load_dotenv()
-
-crucible_url = "https://crucible.lbl.gov/testapi"
-admin_apikey = os.environ.get('ADMIN_APIKEY')
-client = CrucibleClient(crucible_url, admin_apikey)
-logger.info(f"Crucible client initialized with URL: {crucible_url}")
+RUN_ENV = settings().run_env
 
 # Google Sheets configuration
-GOOGLE_SHEETS_ID = os.environ.get('GOOGLE_SHEETS_ID')
-GOOGLE_SERVICE_ACCOUNT_FILE = os.environ.get('GOOGLE_SERVICE_ACCOUNT_FILE')
+GOOGLE_SHEETS_ID = settings().google_sheets_id
+GOOGLE_SERVICE_ACCOUNT_FILE = settings().google_service_account_file
+GOOGLE_SHEETS_SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
 # =============================================================================
 # SYNTHESIS DATASET FIELD DEFINITIONS
@@ -60,6 +63,28 @@ SYNTHESIS_FIELDS = {
     ]
 }
 
+# Upload rows carry the synthesis fields plus the table's Operator/Timestamp
+# columns. Their normalized record keys (lowercase, underscored) are fixed,
+# so compute them once instead of rewriting DataFrame columns per upload.
+UPLOAD_COLUMNS = {
+    synthesis_type: fields + ["Operator", "Timestamp"]
+    for synthesis_type, fields in SYNTHESIS_FIELDS.items()
+}
+UPLOAD_RECORD_KEYS = {
+    synthesis_type: [column.lower().replace(' ', '_') for column in columns]
+    for synthesis_type, columns in UPLOAD_COLUMNS.items()
+}
+
+# SYNTHESIS_FIELDS never changes at runtime, so serialize the response once
+_SYNTHESIS_FIELDS_BYTES = orjson.dumps({"fields": SYNTHESIS_FIELDS})
+# Weak validator: GZipMiddleware may send this body gzip- or identity-encoded
+_SYNTHESIS_FIELDS_OPAQUE_TAG = f'"{hashlib.sha1(_SYNTHESIS_FIELDS_BYTES).hexdigest()}"'
+_SYNTHESIS_FIELDS_ETAG = f'W/{_SYNTHESIS_FIELDS_OPAQUE_TAG}'
+_SYNTHESIS_FIELDS_HEADERS = {
+    "Cache-Control": "public, max-age=3600",
+    "ETag": _SYNTHESIS_FIELDS_ETAG,
+}
+
 # =============================================================================
 # GOOGLE SHEETS CONFIGURATION (Based on SampleOverview.xlsx format)
 # =============================================================================
@@ -112,23 +137,173 @@ SHEET_CONFIG = {
     }
 }
 
+# =============================================================================
+# GOOGLE SHEET ROW MAPPING: SHEET_CONFIG column -> normalized ds_record key.
+# Columns not listed are left blank; USER_NAME_COLUMN is filled with the uploader.
+# =============================================================================
+
+USER_NAME_COLUMN = "__user_name__"
+
+SHEET_COLUMN_KEYS = {
+    "Solid Precursor": {
+        "SolidPrecursorID": "sample_name",
+        "OperatorName": USER_NAME_COLUMN,
+        "TimeStamp": "timestamp",
+        "Notes": "notes",
+        "CAS": "cas",
+        "RFID": "rfid",
+        "Name": "name",
+        "Abbrev": "abbrev",
+        "Vendor": "vendor",
+        "OpenedTimestamp": "opened_timestamp",
+        "StorageLocation": "storage_location",
+    },
+    "Stock Solution": {
+        "StockSolutionID": "sample_name",
+        "OperatorName": USER_NAME_COLUMN,
+        "TimeStamp": "timestamp",
+        "Notes": "notes",
+        "OrganicSalt_SP-ID": "organic_salt_sp-id",
+        "OrganicSalt_Name": "organic_salt_name",
+        "OrganicCation_ActualWeight_mg": "organic_cation_actual_weight_mg",
+        "MetalSalt_SP-ID": "metal_salt_sp-id",
+        "MetalSalt_Name": "metal_salt_name",
+        "MetalCation_ActualWeight_mg": "metal_cation_actual_weight_mg",
+        "Solvent": "solvent",
+        "SolventVolume_ml": "solvent_volume_ml",
+        "TargetConcentration_mol": "target_concentration_mol",
+        "StorageLocation": "storage_location",
+    },
+    "Precursor Solution": {
+        "PrecursorSolutionID": "sample_name",
+        "OperatorName": USER_NAME_COLUMN,
+        "TimeStamp": "timestamp",
+        "Notes": "notes",
+        "TargetStoichiometry": "target_stoichiometry",
+        "ComponentA_SS-ID": "component_a_ss-id",
+        "ComponentB_SS-ID": "component_b_ss-id",
+        "MixingRatio": "mixing_ratio",
+        "TargetConcentration (M)": "target_concentration_(m)",
+        "StorageLocation": "storage_location",
+        "PSAutobotRecipeFilename": "ps_autobot_recipe_filename",
+    },
+    "Thin Film": {
+        "ThinFilmID": "sample_name",
+        "SubstrateCleaningOperator": "substrate_cleaning_operator",
+        "Substrate": "substrate",
+        "Scribed": "scribed",
+        "SubstrateCleaning": "substrate_cleaning",
+        "SubstrateCleaning_Timestamp": "substrate_cleaning_timestamp",
+        "DepositionOperatorName": USER_NAME_COLUMN,
+        "SubstratePrep": "substrate_prep",
+        "SubstratePrepTimestamp": "substrate_prep_timestamp",
+        "SampleDescription": "sample_description",
+        "PS_ID": "ps_id",
+        "SpinAtmosphere": "spin_atmosphere",
+        "AnnealingAtmosphere": "annealing_atmosphere",
+    },
+}
+
+# Record key (or None for a blank cell) for every sheet column, in column order
+SHEET_ROW_KEYS = {
+    dataset_type: [SHEET_COLUMN_KEYS[dataset_type].get(column) for column in config["columns"]]
+    for dataset_type, config in SHEET_CONFIG.items()
+}
+
+# Concurrent per-record Crucible uploads within one request
+UPLOAD_MAX_WORKERS = 8
+
+# Record fields naming the parent samples each synthesis type is linked to
+PARENT_FIELDS = {
+    "Stock Solution": ('organic_salt_sp-id', 'metal_salt_sp-id'),
+    "Precursor Solution": ('component_a_ss-id', 'component_b_ss-id'),
+}
+
+# Dataset creation runs alongside each record's parent linking (see
+# upload_sample_record). A separate pool, since record tasks wait on these.
+DATASET_EXECUTOR = ThreadPoolExecutor(max_workers=UPLOAD_MAX_WORKERS, thread_name_prefix="dataset")
+
+# Pooled keep-alive transport for Google Sheets calls; transient errors are
+# retried with backoff, and the final response is handed back to gspread
+SHEETS_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3,
+                      status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+)
+
+# Google allows 100 Sheets requests per 100 s per user. This bucket is per
+# process, so it only smooths bursts within one worker: with several workers
+# (or replicas) sharing the service account the combined rate can exceed the
+# quota, and the 429 backoff in sheets_call is what keeps uploads going.
+SHEETS_RATE_LIMITER = RateLimiter(rate=90, period=100)
+
+# Initialized worksheet handles keyed by (spreadsheet id, sheet name). They
+# expire after a minute so tabs renamed/removed by hand are picked up again.
+WORKSHEET_CACHE_TTL = 60  # seconds
+_worksheets = TTLCache(maxsize=8, ttl=WORKSHEET_CACHE_TTL)
+_worksheets_lock = threading.Lock()
+
+@with_backoff(SHEETS_RATE_LIMITER)
+def sheets_call(func, *args, **kwargs):
+    """
+    Call a mutating Sheets API method under the shared quota, retrying rate-limit errors.
+    """
+    return func(*args, **kwargs)
+
+@functools.lru_cache(maxsize=1)
+def get_credentials():
+    """
+    Return the Google service account credentials.
+
+    The key file is read and parsed once per process. Loading is deferred to
+    first use so a missing file is reported by get_worksheet instead of
+    breaking the app at import.
+    """
+    if RUN_ENV != 'cloud':
+        logger.debug("Loading service account credentials from %s", GOOGLE_SERVICE_ACCOUNT_FILE)
+        return Credentials.from_service_account_file(GOOGLE_SERVICE_ACCOUNT_FILE, scopes=GOOGLE_SHEETS_SCOPES)
+    credentials, project = default(scopes=GOOGLE_SHEETS_SCOPES)
+    return credentials
+
+@functools.lru_cache(maxsize=1)
+def get_gspread_client():
+    """
+    Return a gspread client authorized with the service account.
+
+    Built once per process; the underlying AuthorizedSession refreshes the
+    access token on its own when it expires.
+    """
+    logger.debug("Authorizing with Google Sheets API using service account")
+    credentials = get_credentials()
+    session = AuthorizedSession(credentials)
+    session.mount("https://", SHEETS_HTTP_ADAPTER)
+    return gspread.authorize(credentials, session=session)
+
+@functools.lru_cache(maxsize=1)
+def get_spreadsheet():
+    """
+    Return the shared handle to the GOOGLE_SHEETS_ID spreadsheet.
+    """
+    logger.debug("Opening spreadsheet with ID: %s", GOOGLE_SHEETS_ID)
+    return get_gspread_client().open_by_key(GOOGLE_SHEETS_ID)
+
 def initialize_google_sheet_tab(worksheet, dataset_type):
     """
     Initialize a Google Sheet tab with proper headers if empty.
     """
-    # Check if sheet already has headers (more than 2 rows with data)
-    all_values = worksheet.get_all_values()
-    if len(all_values) > 2:
-        logger.debug(f"Sheet '{dataset_type}' already initialized")
+    # Check if sheet already has headers. Row 2 holds the column headers, so a
+    # single-cell read is enough; no need to download the whole sheet.
+    if worksheet.acell('A2').value:
+        logger.debug("Sheet '%s' already initialized", dataset_type)
         return
 
     config = SHEET_CONFIG.get(dataset_type)
     if not config:
-        logger.warning(f"No configuration found for dataset type: {dataset_type}")
+        logger.warning("No configuration found for dataset type: %s", dataset_type)
         return
 
-    # Clear the sheet first
-    worksheet.clear()
+    n_cols = len(config["columns"])
 
     # Row 1: Section header(s) - will be merged
     section_row = ["", ""]  # Start with empty cells
@@ -139,22 +314,57 @@ def initialize_google_sheet_tab(worksheet, dataset_type):
         section_row.append(config["section_headers"][1])
     else:
         section_row.append(config["section_header"])
+    section_row.extend([""] * (n_cols - len(section_row)))
 
-    worksheet.append_row(section_row)
-
-    # Row 2: Column headers
-    worksheet.append_row(config["columns"])
-
-    # Merge cells for section headers
+    # Merge ranges for section headers (0-based, end-exclusive column indexes)
     if "section_headers" in config:
         # For ThinFilms: merge cells for both section headers
-        worksheet.merge_cells(1, 3, 1, 7, merge_type='MERGE_ALL')
-        worksheet.merge_cells(1, 8, 1, len(config["columns"]), merge_type='MERGE_ALL')
+        merge_columns = [(2, 7), (7, n_cols)]
     else:
         # For other sheets: merge section header across all columns
-        worksheet.merge_cells(1, 3, 1, len(config["columns"]), merge_type='MERGE_ALL')
-
-    logger.info(f"Initialized Google Sheet tab '{config['sheet_name']}' with headers")
+        merge_columns = [(2, n_cols)]
+
+    def header_row(values):
+        return {"values": [{"userEnteredValue": {"stringValue": v}} for v in values]}
+
+    # Write both header rows (row 2: column headers) and merge the section
+    # headers in a single batchUpdate request
+    sheet_requests = []
+    if worksheet.col_count < n_cols:
+        # updateCells/mergeCells don't grow the grid (unlike the values API),
+        # so widen a narrower existing tab first
+        sheet_requests.append({
+            "appendDimension": {
+                "sheetId": worksheet.id,
+                "dimension": "COLUMNS",
+                "length": n_cols - worksheet.col_count
+            }
+        })
+    sheet_requests.append({
+        "updateCells": {
+            "range": {
+                "sheetId": worksheet.id,
+                "startRowIndex": 0, "endRowIndex": 2,
+                "startColumnIndex": 0, "endColumnIndex": n_cols
+            },
+            "rows": [header_row(section_row), header_row(config["columns"])],
+            "fields": "userEnteredValue"
+        }
+    })
+    for start_col, end_col in merge_columns:
+        sheet_requests.append({
+            "mergeCells": {
+                "range": {
+                    "sheetId": worksheet.id,
+                    "startRowIndex": 0, "endRowIndex": 1,
+                    "startColumnIndex": start_col, "endColumnIndex": end_col
+                },
+                "mergeType": "MERGE_ALL"
+            }
+        })
+    sheets_call(worksheet.spreadsheet.batch_update, {"requests": sheet_requests})
+
+    logger.info("Initialized Google Sheet tab '%s' with headers", config['sheet_name'])
 
 def add_sample(orcid, project, sample_name, description, batch_id):
     """
@@ -171,14 +381,14 @@ def add_sample(orcid, project, sample_name, description, batch_id):
     Returns:
         dict: Sample information including uuid and timestamp
     """
-    logger.debug(f"Adding sample to database: name={sample_name}, project={project}, orcid={orcid}")
+    logger.debug("Adding sample to database: name=%s, project=%s, orcid=%s", sample_name, project, orcid)
     today_date = get_tz_isoformat()
-    logger.debug(f"Adding sample via Crucible client...")
-    new_samp = client.add_sample(sample_name = sample_name, description = description, creation_date = today_date, owner_orcid = orcid, project_id = project)
-    logger.debug(f"Sample added to Crucible: {new_samp}")
+    logger.debug("Adding sample via Crucible client...")
+    new_samp = crucible_call(client.add_sample, sample_name = sample_name, description = description, creation_date = today_date, owner_orcid = orcid, project_id = project)
+    logger.debug("Sample added to Crucible: %s", new_samp)
 
     if batch_id:
-        logger.debug(f"Linking sample to batch {batch_id}")
+        logger.debug("Linking sample to batch %s", batch_id)
         client.link_samples(parent_id = batch_id, child_id = new_samp['unique_id'])
 
     return {
@@ -190,21 +400,19 @@ def add_sample(orcid, project, sample_name, description, batch_id):
         'timestamp': today_date
     }
 
-def add_synthesis_dataset(orcid, project, ds_record, synthesis_type, user_name, session_name = None):
+def create_synthesis_dataset(orcid, project, ds_record, synthesis_type, session_name = None):
     """
-    Add synthesis dataset to the database and Google Sheet.
+    Create the synthesis dataset for a record in the database.
 
     Args:
         orcid: User's ORCID
         project: Selected or new project name
         ds_record: Dictionary with synthesis data and sample info
-        today_date: Timestamp string
         synthesis_type: Type of synthesis dataset
-        user_name: User's full name
         session_name: Optional session name
 
     Returns:
-        str: Success or error message
+        str: unique_id of the new dataset
     """
     sample_name = ds_record['sample_name']
     dataset_name = f'{synthesis_type} recipe for {sample_name}'
@@ -218,192 +426,141 @@ def add_synthesis_dataset(orcid, project, ds_record, synthesis_type, user_name,
 
     # Create keywords list, filtering out None values
     keywords = [k for k in [synthesis_type, sample_name, session_name] if k is not None]
-    new_ds = client.create_new_dataset(ds_obj, scientific_metadata = ds_record, keywords = keywords)
-    found_samples = client.list_samples(sample_name = sample_name)
-    if len(found_samples) == 0:
-        raise Exception(f'Sample with name {sample_name} not found')
-    elif len(found_samples) > 1:
-        raise Exception(f'Multiple samples with name {sample_name} were found: {found_samples}')
-    else:
-        sample = found_samples[-1]
+    new_ds = crucible_call(client.create_new_dataset, ds_obj, scientific_metadata = ds_record, keywords = keywords)
+    return new_ds['created_record']['unique_id']
 
-    client.add_dataset_to_sample(dataset_id = new_ds['created_record']['unique_id'], sample_id = sample['unique_id'])
-
-    # update spreadsheet
-    ds_record['dsid'] = new_ds['created_record']['unique_id']
-    add_dataset_to_google_sheet(synthesis_type, ds_record, user_name)
-
-    return 
-
-def add_dataset_to_google_sheet(dataset_type, ds_record, user_name):
+def get_worksheet(dataset_type, refresh=False):
     """
-    Add dataset rows to the appropriate Google Sheet tab with SampleOverview.xlsx format.
-    Creates the sheet and initializes headers if it doesn't exist.
+    Return the worksheet for a dataset type, creating and initializing it if needed.
+
+    Handles are cached for WORKSHEET_CACHE_TTL seconds, so bursts of uploads
+    skip the tab lookup and header check.
 
     Args:
         dataset_type: Type of dataset (Solid Precursor, Precursor Solution, etc.)
-        ds_record: Dictionary with dataset record to add
-        user_name: User's full name
-        today_date: ISO format timestamp
+        refresh: Ignore any cached handle and look the worksheet up again
 
     Returns:
-        None
+        gspread.Worksheet
 
     Raises:
         Exception: If Google Sheets configuration is missing or API call fails
     """
-    logger.debug(f"Adding synthesis info to Google Sheet: {dataset_type} for {ds_record}")
     if not GOOGLE_SHEETS_ID or (not GOOGLE_SERVICE_ACCOUNT_FILE and RUN_ENV != 'cloud'):
         error_msg = "Google Sheets configuration missing. Please set GOOGLE_SHEETS_ID and GOOGLE_SERVICE_ACCOUNT_FILE in .env file"
         logger.error(error_msg)
         raise Exception(error_msg)
 
-    # Set up credentials and authorize
-    logger.debug(f"Authorizing with Google Sheets API using service account")
-    scopes = ['https://www.googleapis.com/auth/spreadsheets']
-    if RUN_ENV != 'cloud':
-        credentials = Credentials.from_service_account_file(GOOGLE_SERVICE_ACCOUNT_FILE, scopes=scopes)
-    else:
-        credentials, project = default(scopes=scopes)
-    gc = gspread.authorize(credentials)
-
-    # Open the spreadsheet
-    logger.debug(f"Opening spreadsheet with ID: {GOOGLE_SHEETS_ID}")
-    spreadsheet = gc.open_by_key(GOOGLE_SHEETS_ID)
-
     # Get configuration for this dataset type
     config = SHEET_CONFIG.get(dataset_type)
     if not config:
         raise ValueError(f"Unknown dataset type: {dataset_type}")
 
     sheet_name = config["sheet_name"]
+    cache_key = (GOOGLE_SHEETS_ID, sheet_name)
 
-    # Get or create the worksheet
-    try:
-        worksheet = spreadsheet.worksheet(sheet_name)
-        logger.debug(f"Found worksheet: {sheet_name}")
-    except gspread.exceptions.WorksheetNotFound:
-        logger.info(f"Creating new worksheet: {sheet_name}")
-        worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=100, cols=len(config["columns"]))
-
-    # Initialize headers if needed
-    initialize_google_sheet_tab(worksheet, dataset_type)
-
-    # Helper function to safely get values
-    def get_val(key):
-        # Try lowercase version of the key
-        val = ds_record.get(key.lower().replace(' ', '_').replace('-', '-'))
-        if val is None:
-            # Try exact key match
-            val = ds_record.get(key)
-        return str(val) if val is not None and val != '' else ""
-
-    # Build row data based on dataset type and column order
-    row_data = []
-
-    if dataset_type == "Solid Precursor":
-        row_data = [
-            get_val('sample_name'),
-            user_name,
-            get_val('timestamp'),
-            get_val('notes'),
-            get_val('cas'),
-            get_val('rfid'),
-            get_val('name'),
-            get_val('abbrev'),
-            get_val('vendor'),
-            get_val('opened_timestamp'),
-            get_val('storage_location'),
-            "",  # NMR_ID
-            ""   # PhotoID
-        ]
-    elif dataset_type == "Stock Solution":
-        row_data = [
-            get_val('sample_name'),
-            user_name,
-            get_val('timestamp'),
-            get_val('notes'),
-            get_val('organic_salt_sp-id'),
-            get_val('organic_salt_name'),
-            get_val('organic_cation_actual_weight_mg'),
-            get_val('metal_salt_sp-id'),
-            get_val('metal_salt_name'),
-            get_val('metal_cation_actual_weight_mg'),
-            get_val('solvent'),
-            get_val('solvent_volume_ml'),
-            get_val('target_concentration_mol'),
-            get_val('storage_location'),
-            ""  # Photo_ID
-        ]
-    elif dataset_type == "Precursor Solution":
-        row_data = [
-            get_val('sample_name'),
-            user_name,
-            get_val('timestamp'),
-            get_val('notes'),
-            get_val('target_stoichiometry'),
-            get_val('component_a_ss-id'),
-            get_val('component_b_ss-id'),
-            get_val('mixing_ratio'),
-            get_val('target_concentration_(m)'),
-            get_val('storage_location'),
-            get_val('ps_autobot_recipe_filename'),
-            ""  # Photo_ID
-        ]
-    elif dataset_type == "Thin Film":
-        row_data = [
-            get_val('sample_name'),
-            get_val('substrate_cleaning_operator'),
-            get_val('substrate'),
-            get_val('scribed'),
-            get_val('substrate_cleaning'),
-            get_val('substrate_cleaning_timestamp'),
-            user_name,  # DepositionOperatorName
-            get_val('substrate_prep'),
-            get_val('substrate_prep_timestamp'),
-            get_val('sample_description'),
-            "",  # BatchID
-            "",  # BatchUUID
-            get_val('ps_id'),
-            get_val('spin_atmosphere'),
-            get_val('annealing_atmosphere'),
-            "",  # SpinHumidity
-            "",  # AnnealingHumidity
-            "",  # SolutionVolume
-            "",  # SpinSpeed
-            "",  # SpinAcceleration
-            "",  # SpinDuration
-            "",  # AnnealingTemp
-            "",  # AnnealingDuration
-            "",  # DepositionRecipe
-            "",  # DepositionLogfile
-            "",  # HumidityLog
-            "",  # Photo_File
-            "",  # Photo_ID
-            "",  # XRD_File
-            "",  # XRD_ID
-            "",  # UV-Vis_File
-            "",  # UV-Vis_ID
-            "",  # GIWAXS_ID
-            "",  # GIWAXS_TFChildID
-            "",  # RGA_ID
-            ""   # RGA_TFChildID
-        ]
-    else:
-        raise ValueError(f"Unsupported dataset type: {dataset_type}")
+    with _worksheets_lock:
+        worksheet = None if refresh else _worksheets.get(cache_key)
+        if worksheet is not None:
+            return worksheet
 
-    worksheet.append_row(row_data)
+        # Reuse the process-wide authorized spreadsheet handle
+        spreadsheet = get_spreadsheet()
 
-    logger.info(f"Successfully added {ds_record.get('sample_name', 'unknown')} to Google Sheet tab '{sheet_name}'")
+        # Get or create the worksheet
+        try:
+            worksheet = spreadsheet.worksheet(sheet_name)
+            logger.debug("Found worksheet: %s", sheet_name)
+        except gspread.exceptions.WorksheetNotFound:
+            logger.info("Creating new worksheet: %s", sheet_name)
+            worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=100, cols=len(config["columns"]))
+
+        # Initialize headers if needed; only cache the handle once that succeeded
+        initialize_google_sheet_tab(worksheet, dataset_type)
+        _worksheets[cache_key] = worksheet
+        return worksheet
+
+def get_val(ds_record, key):
+    """
+    Return a record value as a sheet cell string ("" for missing/empty values).
+
+    Keys are the normalized record keys from SHEET_ROW_KEYS.
+    """
+    val = ds_record.get(key)
+    return str(val) if val not in (None, '') else ""
 
+def build_sheet_row(row_keys, ds_record, user_name):
+    """
+    Build one Google Sheet row for a dataset record.
+
+    Args:
+        row_keys: Record key per sheet column (a SHEET_ROW_KEYS entry)
+        ds_record: Dictionary with dataset record
+        user_name: User's full name
 
-def link_to_parent_by_name(ds_record, parent_field, project, sample_id):
+    Returns:
+        list of str: Cell values
+    """
+    return [
+        user_name if key == USER_NAME_COLUMN else get_val(ds_record, key) if key else ""
+        for key in row_keys
+    ]
+
+# Row builder per dataset type: (ds_record, user_name) -> row
+_ROW_BUILDERS = {
+    dataset_type: functools.partial(build_sheet_row, row_keys)
+    for dataset_type, row_keys in SHEET_ROW_KEYS.items()
+}
+
+def add_dataset_to_google_sheet(dataset_type, ds_records, user_name, refresh_worksheet=False):
+    """
+    Add dataset rows to the appropriate Google Sheet tab with SampleOverview.xlsx format.
+    Creates the sheet and initializes headers if it doesn't exist.
+
+    All rows are written with a single append_rows call, so a batch costs one
+    Sheets API request instead of one per record.
+
+    Args:
+        dataset_type: Type of dataset (Solid Precursor, Precursor Solution, etc.)
+        ds_records: List of dataset record dictionaries to add
+        user_name: User's full name
+        refresh_worksheet: Look the worksheet up again instead of using a cached handle
+
+    Returns:
+        None
+
+    Raises:
+        Exception: If Google Sheets configuration is missing or API call fails
+    """
+    if not ds_records:
+        return
+    logger.debug("Adding %s %s records to Google Sheet", len(ds_records), dataset_type)
+
+    try:
+        build = _ROW_BUILDERS[dataset_type]
+    except KeyError:
+        raise ValueError(f"Unsupported dataset type: {dataset_type}") from None
+    rows = [build(ds_record, user_name) for ds_record in ds_records]
+    worksheet = get_worksheet(dataset_type, refresh=refresh_worksheet)
+    sheets_call(worksheet.append_rows, rows)
+
+    logger.info("Successfully added %s rows to Google Sheet tab '%s'", len(rows), worksheet.title)
+
+
+def link_to_parent_by_name(ds_record, parent_field, project, sample_id, parent_cache = None):
     parent_sample = ds_record[parent_field]
     if parent_sample is None:
         return
+    logger.debug("parent_sample=%s", parent_sample)
+
+    # parent_cache maps (project, parent name) -> list_samples result for the current upload
+    cache_key = (project, parent_sample)
+    if parent_cache is not None and cache_key in parent_cache:
+        samples_with_parent_name = parent_cache[cache_key]
     else:
-        print(parent_sample)
-    samples_with_parent_name = client.list_samples(sample_name = parent_sample, project_id = project)
+        samples_with_parent_name = client.list_samples(sample_name = parent_sample, project_id = project)
+        if parent_cache is not None:
+            parent_cache[cache_key] = samples_with_parent_name
     
     if len(samples_with_parent_name) == 1:
         parent_sample_id = samples_with_parent_name[-1]['unique_id']
@@ -419,51 +576,170 @@ def link_to_parent_by_name(ds_record, parent_field, project, sample_id):
 
 
 
-def upload_all_sample_synthesis_info(orcid, project, dataset_df, synthesis_type, batch_id, user_name, session_name=None):
-    logger.debug(f"Adding {len(dataset_df)} rows of {synthesis_type} dataset to project {project}")
-    today_date = get_tz_isoformat()
+def upload_sample_record(orcid, project, record, synthesis_type, batch_id, user_name, session_name=None, parent_cache=None):
+    """
+    Create one sample in Crucible, link it to its parents and attach its synthesis dataset.
 
-    # Add to Crucible database
-    dataset_df = dataset_df.replace('', np.nan).dropna(how = 'all')
-    dataset_df = dataset_df.replace(np.nan, None)
-    dataset_df.columns = [x.lower().replace(' ', '_') for x in dataset_df.columns]
-    ds_dictionaries = dataset_df.to_dict('records')
+    Sets record['dsid'] to the new dataset's unique_id.
+
+    Args:
+        orcid: User's ORCID
+        project: Selected project
+        record: Normalized row dictionary (lowercase, underscored keys)
+        synthesis_type: Type of synthesis dataset
+        batch_id: Optional batch unique_id
+        user_name: User's full name
+        session_name: Optional session name
+        parent_cache: Optional dict of parent sample lookups shared across the upload
+
+    Raises:
+        Exception: If any Crucible call fails
+    """
+    new_samp = add_sample( orcid = orcid,
+                           project = project,
+                           sample_name = record['sample_name'],
+                           description = record['sample_description'],
+                           batch_id = batch_id)
+    sample_uuid = new_samp['unique_id']
+
+    # Only start the dataset once its sample exists, then create it while the
+    # parents are linked
+    dataset_future = DATASET_EXECUTOR.submit(create_synthesis_dataset, orcid, project, record,
+                                             synthesis_type, session_name)
+    try:
+        # link to SP (stock solutions) / SS (precursor solutions)
+        parent_fields = PARENT_FIELDS.get(synthesis_type, ())
+        if parent_fields:
+            logger.debug("record=%s", record)
+            for parent_field in parent_fields:
+                link_to_parent_by_name(record, parent_field, project, sample_uuid, parent_cache)
+    finally:
+        # Attach the dataset even if a parent link failed, so it never dangles
+        dataset_id = dataset_future.result()
+        client.add_dataset_to_sample(dataset_id = dataset_id, sample_id = sample_uuid)
+
+    # The spreadsheet is updated for the whole batch by the caller
+    record['dsid'] = dataset_id
+
+
+def is_blank(value):
+    # value != value only holds for NaN
+    return value is None or value == '' or value != value
+
+def rows_to_records(synthesis_type, rows):
+    """
+    Turn table rows from the frontend into normalized dataset records.
+
+    Args:
+        synthesis_type: Type of synthesis dataset (a SYNTHESIS_FIELDS key)
+        rows: Row dictionaries keyed by table column name
+
+    Returns:
+        list of dict: One record per non-empty row, keyed by normalized record
+        key (lowercase, underscored), with blank cells as None
+    """
+    columns = UPLOAD_COLUMNS[synthesis_type]
+    keys = UPLOAD_RECORD_KEYS[synthesis_type]
+    records = []
+    for row in rows:
+        values = [None if is_blank(v) else v for v in map(row.get, columns)]
+        # Pasted tables often carry trailing empty rows
+        if any(v is not None for v in values):
+            records.append(dict(zip(keys, values)))
+    return records
+
+def find_duplicate_sample_names(ds_dictionaries, existing_names):
+    """
+    Find sample names in an upload that would not identify a single sample.
+
+    Args:
+        ds_dictionaries: Normalized records of the upload
+        existing_names: Sample names already used in the project
+
+    Returns:
+        dict: sample name -> reason it is a duplicate
+    """
+    counts = Counter(record.get('sample_name') for record in ds_dictionaries)
+    duplicates = {}
+    for name, count in counts.items():
+        if name is None:
+            continue
+        if name in existing_names:
+            duplicates[name] = "Sample name already exists in the project"
+        elif count > 1:
+            duplicates[name] = f"Sample name appears {count} times in this upload"
+    return duplicates
+
+def upload_all_sample_synthesis_info(orcid, project, ds_dictionaries, synthesis_type, batch_id, user_name, session_name=None,
+                                     refresh_worksheet=False):
+    logger.debug("Adding %s rows of %s dataset to project %s", len(ds_dictionaries), synthesis_type, project)
+    today_date = get_tz_isoformat()
 
     success_count = 0
     failed_count = 0
     error_messages = []
+    uploaded_records = []
+
+    # Records are independent, so overlap their Crucible round trips. Results
+    # are collected in input order so the sheet rows keep the user's order.
+    with ThreadPoolExecutor(max_workers=UPLOAD_MAX_WORKERS) as executor:
+        # One listing of the project replaces a per-record check that the new
+        # name is unique; it runs alongside the parent lookups below
+        project_samples = executor.submit(client.list_samples, project_id = project)
+
+        # Many rows usually share a handful of parents: look each one up once
+        parent_fields = PARENT_FIELDS.get(synthesis_type, ())
+        parent_names = {record[f] for record in ds_dictionaries for f in parent_fields if record.get(f) is not None}
+        lookups = {
+            name: executor.submit(client.list_samples, sample_name = name, project_id = project)
+            for name in parent_names
+        }
+        parent_cache = {}
+        for name, future in lookups.items():
+            try:
+                parent_cache[(project, name)] = future.result()
+            except Exception as err:
+                # Left uncached; the record's own lookup retries and reports the error
+                logger.warning("Parent lookup failed for %s: %s", name, err)
 
-    for record in ds_dictionaries:
         try:
-            new_samp = add_sample( orcid = orcid,
-                                   project = project,
-                                   sample_name = record['sample_name'],
-                                   description = record['sample_description'],
-                                   batch_id = batch_id)
-            sample_uuid = new_samp['unique_id']
-
-            if synthesis_type == 'Stock Solution':
-                # link to SP
-                print(record)
-                link_to_parent_by_name(record, 'organic_salt_sp-id', project, sample_uuid)
-                link_to_parent_by_name(record, 'metal_salt_sp-id', project, sample_uuid)
-
-
-            if synthesis_type == 'Precursor Solution':
-                # link to SS
-                print(record)
-                link_to_parent_by_name(record, 'component_a_ss-id', project, sample_uuid)
-                link_to_parent_by_name(record, 'component_b_ss-id', project, sample_uuid)
-                
-            add_synthesis_dataset(orcid, project, record, synthesis_type, user_name, session_name)
-            success_count += 1
-
+            existing_names = {sample.get('sample_name') for sample in project_samples.result()}
         except Exception as err:
-            failed_count += 1
-            sample_name = record.get('sample_name', 'Unknown')
-            error_msg = f"Sample '{sample_name}': {str(err)}"
-            error_messages.append(error_msg)
-            logger.error(f"dataset upload failed for {record} with error: {err}")
+            # Still catch repeats within the upload itself
+            logger.warning("Listing samples in project %s failed: %s", project, err)
+            existing_names = set()
+        duplicate_names = find_duplicate_sample_names(ds_dictionaries, existing_names)
+
+        # Records with a duplicate name are not uploaded (None) and reported as failed
+        futures = [
+            None if record.get('sample_name') in duplicate_names else
+            executor.submit(upload_sample_record, orcid, project, record, synthesis_type,
+                            batch_id, user_name, session_name, parent_cache)
+            for record in ds_dictionaries
+        ]
+        for record, future in zip(ds_dictionaries, futures):
+            try:
+                if future is None:
+                    raise ValueError(duplicate_names[record['sample_name']])
+                future.result()
+                uploaded_records.append(record)
+                success_count += 1
+
+            except Exception as err:
+                failed_count += 1
+                sample_name = record.get('sample_name', 'Unknown')
+                error_msg = f"Sample '{sample_name}': {str(err)}"
+                error_messages.append(error_msg)
+                logger.error("dataset upload failed for %s with error: %s", record, err)
+
+    # Write every uploaded record to the Google Sheet in one request
+    sheet_failed = False
+    try:
+        add_dataset_to_google_sheet(synthesis_type, uploaded_records, user_name, refresh_worksheet)
+    except Exception as err:
+        sheet_failed = True
+        error_messages.append(f"Google Sheet update failed: {str(err)}")
+        logger.error("Google Sheet update failed for %s records with error: %s", len(uploaded_records), err)
 
     summary = {
         "Project": project,
@@ -477,7 +753,12 @@ def upload_all_sample_synthesis_info(orcid, project, dataset_df, synthesis_type,
         summary["Errors"] = error_messages
 
     # Generate appropriate status message based on results
-    if failed_count == 0 and success_count > 0:
+    if sheet_failed and failed_count == 0:
+        status_msg = f"Uploaded {success_count} samples to Crucible project '{project}', but the Google Sheet update failed"
+    elif sheet_failed:
+        status_msg = (f"Partial upload: {success_count} samples uploaded to Crucible, {failed_count} failed, "
+                      f"and the Google Sheet update failed")
+    elif failed_count == 0 and success_count > 0:
         status_msg = f"Successfully uploaded {success_count} samples to project '{project}'"
     elif success_count == 0 and failed_count > 0:
         status_msg = f"Upload failed: All {failed_count} samples failed to upload"
@@ -488,59 +769,80 @@ def upload_all_sample_synthesis_info(orcid, project, dataset_df, synthesis_type,
 
     return status_msg, summary
 
+def etag_matches(if_none_match, opaque_tag):
+    """
+    Weakly compare an If-None-Match header against an entity tag (without W/).
+    """
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(","))
+
 @router.get("/fields", response_model=SynthesisFieldsResponse)
-async def get_synthesis_fields():
+async def get_synthesis_fields(if_none_match: Optional[str] = Header(None)):
     """
     Return the SYNTHESIS_FIELDS dictionary for the frontend.
 
     Flow:
     1. Frontend requests available synthesis types and their fields
-    2. Return SYNTHESIS_FIELDS dictionary
+    2. Return 304 if the client already has the current version (ETag)
+    3. Otherwise return the pre-serialized SYNTHESIS_FIELDS payload
     """
-    try:
-        logger.info("Fetching synthesis fields")
-        return SynthesisFieldsResponse(fields=SYNTHESIS_FIELDS)
-    except Exception as e:
-        logger.error(f"Error fetching synthesis fields: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    logger.info("Fetching synthesis fields")
+    if if_none_match and etag_matches(if_none_match, _SYNTHESIS_FIELDS_OPAQUE_TAG):
+        return Response(status_code=304, headers=_SYNTHESIS_FIELDS_HEADERS)
+    return Response(
+        content=_SYNTHESIS_FIELDS_BYTES,
+        media_type="application/json",
+        headers=_SYNTHESIS_FIELDS_HEADERS
+    )
 
 @router.post("/upload", response_model=SynthesisUploadResponse)
-async def upload_synthesis_data(request: SynthesisUploadRequest):
+async def upload_synthesis_data(request: SynthesisUploadRequest, bust_cache: bool = False):
     """
     Upload synthesis data to database and Google Sheets.
 
     Flow:
     1. Receive synthesis data from frontend (array of row objects)
-    2. Convert to DataFrame
-    3. Call upload_all_sample_synthesis_info()
+    2. Normalize the rows into records, dropping empty ones
+    3. Call upload_all_sample_synthesis_info() in a worker thread
     4. Return success/failure summary
+
+    The upload runs within the request (not as a background task) because
+    Cloud Run throttles CPU once a response has been sent.
+
+    Pass ?bust_cache=1 to re-read the worksheet after editing the sheet by hand.
     """
     try:
-        logger.info(f"Upload request: {request.synthesis_type} for project {request.project}")
-        logger.info(f"Data rows: {len(request.data)}")
+        logger.info("Upload request: %s for project %s", request.synthesis_type, request.project)
+        logger.info("Data rows: %s", len(request.data))
 
-        # Convert array of objects to DataFrame
         if not request.data or len(request.data) == 0:
             return SynthesisUploadResponse(
                 success=False,
                 message="No data provided for upload"
             )
 
-        # Create DataFrame from the data
-        df = pd.DataFrame(request.data)
-
-        # TODO: Call your actual function here
-        status_msg, summary = upload_all_sample_synthesis_info(
-                                    orcid=request.orcid,
-                                    project=request.project,
-                                    dataset_df=df,
-                                    synthesis_type=request.synthesis_type,
-                                    batch_id=request.batch_id,
-                                    user_name=request.user_name,
-                                    session_name=request.session_name
-                                )
+        if request.synthesis_type not in UPLOAD_COLUMNS:
+            return SynthesisUploadResponse(
+                success=False,
+                message=f"Unknown synthesis type: {request.synthesis_type}"
+            )
 
-        logger.info(f"Upload completed: {status_msg}")
+        records = rows_to_records(request.synthesis_type, request.data)
+
+        # Blocking Crucible/Sheets I/O runs off the event loop
+        status_msg, summary = await asyncio.to_thread(
+            upload_all_sample_synthesis_info,
+            orcid=request.orcid,
+            project=request.project,
+            ds_dictionaries=records,
+            synthesis_type=request.synthesis_type,
+            batch_id=request.batch_id,
+            user_name=request.user_name,
+            session_name=request.session_name,
+            refresh_worksheet=bust_cache
+        )
+        logger.info("Upload completed: %s", status_msg)
 
         return SynthesisUploadResponse(
             success=True,
@@ -549,5 +851,5 @@ async def upload_synthesis_data(request: SynthesisUploadRequest):
         )
 
     except Exception as e:
-        logger.error(f"Upload error: {str(e)}")
+        logger.error("Upload error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,33 @@
+import os
+import functools
+from types import SimpleNamespace
+from dotenv import load_dotenv
+
+
+@functools.lru_cache(maxsize=1)
+def settings():
+    """
+    Return the application configuration, loading .env on first use.
+
+    The .env file is only read outside Cloud Run (RUN_ENV != 'cloud'), where
+    configuration comes from the service's environment instead. REDIS_URL is
+    required there; local development defaults to a Redis on localhost.
+    """
+    run_env = os.getenv('RUN_ENV')
+    if run_env != 'cloud':
+        load_dotenv()
+
+    if run_env == 'cloud':
+        # Sessions and caches live in Redis: fail at startup, not on every request
+        redis_url = os.environ['REDIS_URL']
+    else:
+        redis_url = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+
+    return SimpleNamespace(
+        run_env=run_env,
+        crucible_url="https://crucible.lbl.gov/testapi",
+        admin_apikey=os.environ.get('ADMIN_APIKEY'),
+        redis_url=redis_url,
+        google_sheets_id=os.environ.get('GOOGLE_SHEETS_ID'),
+        google_service_account_file=os.environ.get('GOOGLE_SERVICE_ACCOUNT_FILE'),
+    )
@@ -0,0 +1,105 @@
+import gzip
+import logging
+import mimetypes
+import os
+import sys
+import tempfile
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.html', '.svg')
+
+# Vite emits content-hashed file names under assets/, so those never change
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+
+def precompress_directory(directory):
+    """
+    Write a gzipped sibling (<file>.gz) for every compressible file in a directory tree.
+
+    Meant to run once at build time (see the Dockerfile). Each .gz is written to
+    a temporary file and moved into place, so readers never see a partial file.
+
+    Args:
+        directory: Root directory of the built frontend
+
+    Returns:
+        int: Number of compressible files
+    """
+    compressed = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.realpath(os.path.join(root, name))
+            gz_path = path + ".gz"
+            if not os.path.exists(gz_path) or os.path.getmtime(gz_path) < os.path.getmtime(path):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                fd, tmp_path = tempfile.mkstemp(dir=root, suffix=".gz.tmp")
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(gzip.compress(data, compresslevel=9))
+                # mkstemp creates the file private; match the original's permissions
+                os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+                os.replace(tmp_path, gz_path)
+            compressed += 1
+    logger.info("Pre-compressed %s static files in '%s'", compressed, directory)
+    return compressed
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves pre-gzipped assets and sets long-lived caching headers.
+
+    The .gz siblings are produced at build time by precompress_directory; files
+    without one are served uncompressed. Hashed bundles under assets/ are marked
+    immutable; everything else (notably index.html) is revalidated on every load
+    so new deployments are picked up.
+    """
+
+    def __init__(self, *, directory, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        root = os.path.realpath(directory)
+        self._assets_prefix = os.path.join(root, "assets") + os.sep
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        full_path = str(full_path)
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL
+            if full_path.startswith(self._assets_prefix) else DEFAULT_CACHE_CONTROL
+        }
+
+        media_type = mimetypes.guess_type(full_path)[0]
+        request_headers = Headers(scope=scope)
+        if full_path.endswith(COMPRESSIBLE_EXTENSIONS):
+            headers["Vary"] = "Accept-Encoding"
+            if "gzip" in request_headers.get("accept-encoding", ""):
+                try:
+                    gz_stat = os.stat(full_path + ".gz")
+                except FileNotFoundError:
+                    pass
+                else:
+                    headers["Content-Encoding"] = "gzip"
+                    full_path, stat_result = full_path + ".gz", gz_stat
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            stat_result=stat_result,
+            method=scope["method"],
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    precompress_directory(sys.argv[1] if len(sys.argv) > 1 else "static")
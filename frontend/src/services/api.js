@@ -40,9 +40,24 @@ export const getSynthesisFields = async () => {
   return response.data;
 };
 
+// Large uploads can take minutes; give up after this long instead of waiting forever
+const UPLOAD_TIMEOUT_MS = 5 * 60 * 1000;
+
 export const uploadSynthesisData = async (uploadData) => {
-  const response = await api.post('/synthesis/upload', uploadData);
-  return response.data;
+  try {
+    const response = await api.post('/synthesis/upload', uploadData, {
+      timeout: UPLOAD_TIMEOUT_MS
+    });
+    return response.data;
+  } catch (err) {
+    if (err.code === 'ECONNABORTED' || err.code === 'ETIMEDOUT') {
+      return {
+        success: false,
+        message: 'Upload timed out. Some samples may still have been created; check the project before retrying.'
+      };
+    }
+    throw err;
+  }
 };
 
 // ============================================================================